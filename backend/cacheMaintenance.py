@@ -0,0 +1,328 @@
+import os
+import time
+import threading
+from pathlib import Path
+import fileData
+
+try:
+    import fcntl
+except ImportError:
+    # not available on windows, passes are then only serialized within one process (by _maintenance_lock)
+    fcntl = None
+
+# disk budgets in bytes, override with environment variables
+CACHE_MAX_BYTES = int(os.getenv("NOTEIFY_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+DEBUG_IMAGES_MAX_BYTES = int(os.getenv("NOTEIFY_DEBUG_IMAGES_MAX_BYTES", 50 * 1024 * 1024))
+OUTPUTS_MAX_BYTES = int(os.getenv("NOTEIFY_OUTPUTS_MAX_BYTES", 50 * 1024 * 1024))
+
+# seconds between scheduled maintenance runs
+MAINTENANCE_INTERVAL = int(os.getenv("NOTEIFY_CACHE_MAINTENANCE_INTERVAL", 6 * 60 * 60))
+
+# refuse to purge orphans when more than this fraction of entries would go,
+# that usually means the notes folder is only partially mounted or synced.
+# small caches are exempt, and a forced run (e.g. after renaming a folder) skips the check
+MAX_ORPHAN_FRACTION = 0.5
+MIN_ORPHAN_GUARD_ENTRIES = 10
+
+# temp files left by an interrupted atomic write are removed once older than this (seconds)
+TEMP_FILE_MAX_AGE = 15 * 60
+
+# lock files shared by every process using the same cache folder
+MAINTENANCE_LOCK_FILE = fileData.CACHE_DIR / "maintenance.lock"
+SCHEDULER_LOCK_FILE = fileData.CACHE_DIR / "scheduler.lock"
+
+# serializes passes within this process, flock alone isn't enough where fcntl is missing
+_maintenance_lock = threading.Lock()
+
+
+# get size of file, 0 if it has already gone away
+def get_file_size(path):
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+# delete file and return bytes reclaimed
+def remove_file(path):
+    size = get_file_size(path)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return 0
+    return size
+
+# take exclusive lock on lock file across processes
+# returns open lock file (close it to release) or None if non-blocking and already held
+def acquire_process_lock(path, blocking=True):
+    lock_file = open(path, "a")
+    if fcntl:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+    return lock_file
+
+# rewrite legacy pretty-printed cache entries as compressed json
+def compact_cache(index):
+    compacted = 0
+    reclaimed = 0
+
+    for cache_file in fileData.get_cache_files():
+        if cache_file.name.endswith(fileData.CACHE_SUFFIX):
+            continue
+
+        cache_key = fileData.cache_key_from_filename(cache_file.name)
+        compact_file = fileData.CACHE_DIR / f"{cache_key}{fileData.CACHE_SUFFIX}"
+
+        # compressed entry is newer (save was interrupted before the legacy file was removed)
+        if compact_file.exists():
+            reclaimed += remove_file(cache_file)
+            continue
+
+        try:
+            cache_data = fileData.read_cache_file(cache_file)
+        except Exception as e:
+            # unreadable entries are removed, they would be reprocessed anyway
+            print(f"Removing unreadable cache entry {cache_file.name}: {e}")
+            reclaimed += remove_file(cache_file)
+            continue
+
+        old_size = get_file_size(cache_file)
+        fileData.write_cache_file(compact_file, cache_data)
+
+        # keep access time so compaction doesn't reset lru order
+        stat = cache_file.stat()
+        os.utime(compact_file, (stat.st_atime, stat.st_mtime))
+        cache_file.unlink()
+
+        # gzip overhead can make tiny entries slightly bigger, never report that as negative
+        reclaimed += max(0, old_size - get_file_size(compact_file))
+        compacted += 1
+
+        # backfill index for entries cached before it existed
+        if cache_key not in index:
+            index[cache_key] = fileData.index_entry(cache_data)
+
+    return compacted, reclaimed
+
+# remove temp files left behind by interrupted fileData.write_file_atomic calls
+def remove_stale_temp_files():
+    removed = 0
+    reclaimed = 0
+    cutoff = time.time() - TEMP_FILE_MAX_AGE
+
+    for folder in {fileData.CACHE_DIR, fileData.STATE_FILE.parent}:
+        for path in folder.glob(".*.tmp"):
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            reclaimed += remove_file(path)
+            removed += 1
+
+    return removed, reclaimed
+
+# check notes folder is mounted and readable
+def notes_folder_available():
+    try:
+        with os.scandir(fileData.FOLDER_PATH) as it:
+            next(it, None)
+        return True
+    except OSError:
+        return False
+
+# check if pdf is gone from notes folder (paths outside the folder are never orphans)
+def is_orphaned_path(file_path):
+    path = Path(file_path)
+    try:
+        path.relative_to(fileData.FOLDER_PATH)
+    except ValueError:
+        return False
+    return not path.exists()
+
+# check if purging count of total entries stays within the safety limit
+def within_orphan_limit(count, total):
+    return total < MIN_ORPHAN_GUARD_ENTRIES or count <= total * MAX_ORPHAN_FRACTION
+
+# remove cache entries whose source pdf no longer exists
+# returns (removed, reclaimed bytes, reason orphan cleanup was skipped or None)
+def remove_orphans(index, force=False):
+    removed = 0
+    reclaimed = 0
+    cache_files = {fileData.cache_key_from_filename(path.name): path for path in fileData.get_cache_files()}
+
+    # drop index entries whose cache file is already gone
+    for cache_key in list(index):
+        if cache_key not in cache_files:
+            del index[cache_key]
+
+    # a missing folder usually means drive isn't mounted or synced yet, not that every pdf was deleted
+    if not notes_folder_available():
+        print(f"Skipping orphan cleanup: notes folder not available at {fileData.FOLDER_PATH}")
+        return removed, reclaimed, "folder_unavailable"
+
+    orphans = []
+    for cache_key, cache_file in cache_files.items():
+        entry = index.get(cache_key)
+        if entry is None:
+            # entry missing from index, recover its metadata from the cache file
+            try:
+                cache_data = fileData.read_cache_file(cache_file)
+                entry = index[cache_key] = fileData.index_entry(cache_data)
+            except Exception as e:
+                print(f"Removing unreadable cache entry {cache_file.name}: {e}")
+                reclaimed += remove_file(cache_file)
+                removed += 1
+                continue
+
+        file_path = entry.get("file_path")
+        if file_path and is_orphaned_path(file_path):
+            orphans.append((cache_key, cache_file))
+
+    state = fileData.load_state()
+    stale_paths = [path for path in state if is_orphaned_path(path)]
+
+    if not force:
+        if not within_orphan_limit(len(orphans), len(cache_files)):
+            print(f"Skipping orphan cleanup: {len(orphans)} of {len(cache_files)} cache entries would be removed, "
+                  f"check that the notes folder is fully synced or run with force")
+            return removed, reclaimed, "safety_limit"
+        if not within_orphan_limit(len(stale_paths), len(state)):
+            print(f"Skipping orphan cleanup: {len(stale_paths)} of {len(state)} processed files would be forgotten, "
+                  f"check that the notes folder is fully synced or run with force")
+            return removed, reclaimed, "safety_limit"
+
+    for cache_key, cache_file in orphans:
+        reclaimed += remove_file(cache_file)
+        index.pop(cache_key, None)
+        removed += 1
+
+    # forget processing state for deleted or renamed pdfs
+    if stale_paths:
+        fileData.forget_processed_files(stale_paths)
+
+    return removed, reclaimed, None
+
+# evict least recently used files until folder fits in budget
+def enforce_budget(files, max_bytes):
+    entries = []
+    for path in files:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    reclaimed = 0
+
+    # oldest first
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        reclaimed += remove_file(path)
+        total -= size
+        evicted.append(path)
+
+    return evicted, reclaimed, total
+
+# list files directly inside folder
+def list_folder_files(folder):
+    if not folder.exists():
+        return []
+    return [path for path in folder.iterdir() if path.is_file()]
+
+# run full maintenance pass and report what was reclaimed
+# only one pass runs at a time, even across uvicorn workers or the cli
+# force skips the orphan safety limit
+def run_maintenance(force=False):
+    with _maintenance_lock:
+        lock_file = acquire_process_lock(MAINTENANCE_LOCK_FILE)
+        try:
+            return _run_maintenance(force)
+        finally:
+            lock_file.close()
+
+def _run_maintenance(force):
+    started = time.monotonic()
+
+    # state and index are read and rewritten as a unit, ingestion waits for this pass
+    with fileData.cache_lock:
+        index = fileData.load_cache_index()
+
+        temp_files_removed, temp_reclaimed = remove_stale_temp_files()
+        compacted, compact_reclaimed = compact_cache(index)
+        orphans_removed, orphan_reclaimed, orphan_cleanup_skipped = remove_orphans(index, force=force)
+
+        evicted_cache, cache_reclaimed, cache_bytes = enforce_budget(fileData.get_cache_files(), CACHE_MAX_BYTES)
+        for path in evicted_cache:
+            index.pop(fileData.cache_key_from_filename(path.name), None)
+
+        fileData.save_cache_index(index)
+        cache_entries = len(index)
+
+    evicted_debug, debug_reclaimed, debug_bytes = enforce_budget(list_folder_files(fileData.DEBUG_DIR), DEBUG_IMAGES_MAX_BYTES)
+    evicted_outputs, outputs_reclaimed, outputs_bytes = enforce_budget(list_folder_files(fileData.OUTPUT_DIR), OUTPUTS_MAX_BYTES)
+
+    # cache status shown in the file listing may have changed
+    fileData.invalidate_library_snapshot()
+
+    reclaimed = {
+        "content_cache": temp_reclaimed + compact_reclaimed + orphan_reclaimed + cache_reclaimed,
+        "debug_images": debug_reclaimed,
+        "outputs": outputs_reclaimed
+    }
+
+    report = {
+        "compacted": compacted,
+        "temp_files_removed": temp_files_removed,
+        "orphans_removed": orphans_removed,
+        "orphan_cleanup_skipped": orphan_cleanup_skipped,
+        "evicted": {
+            "content_cache": len(evicted_cache),
+            "debug_images": len(evicted_debug),
+            "outputs": len(evicted_outputs)
+        },
+        "reclaimed_bytes": reclaimed,
+        "total_reclaimed_bytes": sum(reclaimed.values()),
+        "remaining_bytes": {
+            "content_cache": cache_bytes,
+            "debug_images": debug_bytes,
+            "outputs": outputs_bytes
+        },
+        "cache_entries": cache_entries,
+        "duration_seconds": round(time.monotonic() - started, 3)
+    }
+
+    print(f"🧹 Cache maintenance: reclaimed {report['total_reclaimed_bytes']} bytes "
+          f"({orphans_removed} orphaned, {sum(report['evicted'].values())} evicted, {compacted} compacted)")
+
+    return report
+
+# run maintenance now and then every interval seconds in a background thread
+# returns event that stops the scheduler when set, or None if another process already runs one
+def start_maintenance_scheduler(interval=MAINTENANCE_INTERVAL):
+    scheduler_lock = acquire_process_lock(SCHEDULER_LOCK_FILE, blocking=False)
+    if scheduler_lock is None:
+        print("Cache maintenance scheduler already running in another process")
+        return None
+
+    stop_event = threading.Event()
+
+    def loop():
+        try:
+            while not stop_event.is_set():
+                try:
+                    run_maintenance()
+                except Exception as e:
+                    print(f"Error during cache maintenance: {e}")
+                stop_event.wait(interval)
+        finally:
+            scheduler_lock.close()
+
+    thread = threading.Thread(target=loop, name="cache-maintenance", daemon=True)
+    thread.start()
+    return stop_event
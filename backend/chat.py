@@ -1,5 +1,6 @@
 from openai import OpenAI
 import fileData
+import cacheMaintenance
 from dotenv import load_dotenv
 import os
 import base64
@@ -20,17 +21,18 @@ client = OpenAI(api_key=api_key)
 
 def pdf_to_base64_images(pdf_path, max_pages=10):
     # convert pdf to base64 images for gpt to process
+    # returns (base64 images, total page count)
     try:
         images = convert_from_path(pdf_path, dpi=200)
         
         if not images:
             print(f"  WARNING: No images extracted from {pdf_path}")
-            return []
+            return [], 0
         
         print(f"  Extracted {len(images)} page(s), processing first {min(len(images), max_pages)}...")
         
         # debug folder to ensure images are being processed correctly
-        debug_dir = Path(__file__).parent / "debug_images"
+        debug_dir = fileData.DEBUG_DIR
         debug_dir.mkdir(exist_ok=True)
         
         base64_images = []
@@ -46,20 +48,21 @@ def pdf_to_base64_images(pdf_path, max_pages=10):
             base64_images.append(img_str)
             print(f"  Page {i+1}: {len(img_str)} chars in base64")
         
-        return base64_images
+        return base64_images, len(images)
     except Exception as e:
         print(f"Error converting PDF {pdf_path}: {e}")
-        return []
+        return [], None
 
 
 # read each image with gpt and extract content
+# returns (content, page count)
 def read_pdf_with_gpt(pdf_path):
     print(f"Processing {pdf_path.name}...")
     
-    base64_images = pdf_to_base64_images(pdf_path)
+    base64_images, page_count = pdf_to_base64_images(pdf_path)
     
     if not base64_images:
-        return None
+        return None, page_count
     
     # prompt for saving image text to cache
     content = [
@@ -105,12 +108,12 @@ Format each problem clearly. Include the full problem statement but do NOT inclu
         if "unable" in result.lower() or "can't" in result.lower() or "cannot" in result.lower():
             print(f"  WARNING: GPT may be refusing to process. Response: {result[:200]}...")
         
-        return result
+        return result, page_count
     except Exception as e:
         print(f"  ERROR calling OpenAI API: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        return None, page_count
 
 # use gpt to select relevant files based on user query
 def select_relevant_files(user_query, all_pdf_files):
@@ -238,7 +241,7 @@ def save_response_to_file(query, response, files_used):
     from datetime import datetime
     
     # create output folder if it doesn't exist
-    output_dir = Path(__file__).parent / "outputs"
+    output_dir = fileData.OUTPUT_DIR
     output_dir.mkdir(exist_ok=True)
     
     # generate filename from timestamp
@@ -346,12 +349,12 @@ def load_and_process_files(file_list):
         
         for pdf_file in files_to_process:
             print(f"  Processing {pdf_file.name}...")
-            content = read_pdf_with_gpt(pdf_file)
+            content, page_count = read_pdf_with_gpt(pdf_file)
             
             if content:
                 all_notes.append(f"=== {pdf_file.name} ===\n{content}")
                 # add file to cache
-                fileData.save_content_to_cache(pdf_file, content)
+                fileData.save_content_to_cache(pdf_file, content, page_count=page_count)
                 print(f"  ✓ {pdf_file.name} (processed & cached)")
         
         # mark files as processed
@@ -373,6 +376,13 @@ def main():
     print("Type 'exit' to quit.\n")
     print("="*70 + "\n")
     
+    # clean up cache from deleted notes and keep disk usage in budget
+    try:
+        cacheMaintenance.run_maintenance()
+        print()
+    except Exception as e:
+        print(f"Error during cache maintenance: {e}\n")
+    
     while True:
         user_query = input("You: ").strip()
         
@@ -1,6 +1,10 @@
 import os
+import gzip
 import json
+import time
 import hashlib
+import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime
 
@@ -11,6 +15,28 @@ FOLDER_PATH = Path.home() / "Library/CloudStorage/GoogleDrive-logan@theraymonds.
 
 STATE_FILE = Path(__file__).parent / "state.json"
 CACHE_DIR = Path(__file__).parent / "content_cache"
+CACHE_INDEX_FILE = CACHE_DIR / "index.json"
+DEBUG_DIR = Path(__file__).parent / "debug_images"
+OUTPUT_DIR = Path(__file__).parent / "outputs"
+
+# cache entries are stored as compressed json, older entries may still be plain .json
+CACHE_SUFFIX = ".json.gz"
+LEGACY_CACHE_SUFFIX = ".json"
+
+# held while modifying the cache index or state file so maintenance and ingestion don't race
+cache_lock = threading.RLock()
+
+# how long a library snapshot is served before it is refreshed in the background
+LIBRARY_SNAPSHOT_TTL = 10
+LIBRARY_SORT_KEYS = ("name", "path", "folder", "size", "mtime", "page_count")
+
+_library_snapshot = None
+_library_generation = 0
+_library_refreshing = False
+# guards the snapshot reference and refresh state, never held during a folder walk
+_library_lock = threading.Lock()
+# serializes folder walks
+_library_build_lock = threading.Lock()
 
 # create cache folder
 CACHE_DIR.mkdir(exist_ok=True)
@@ -22,10 +48,77 @@ def load_state():
             return json.load(f)
     return {}
 
+# write file via temp file + rename so readers never see a partial write
+def write_file_atomic(path, write, compress=False):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if compress:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                write(f)
+        else:
+            with os.fdopen(fd, "w") as f:
+                write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 # save state file
 def save_state(state):
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+    write_file_atomic(STATE_FILE, lambda f: json.dump(state, f, indent=2))
+
+# load cache index (per cache entry metadata, keyed by cache key)
+def load_cache_index():
+    if CACHE_INDEX_FILE.exists():
+        try:
+            with open(CACHE_INDEX_FILE, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading cache index: {e}")
+    return {}
+
+# save cache index
+def save_cache_index(index):
+    write_file_atomic(CACHE_INDEX_FILE, lambda f: json.dump(index, f, separators=(",", ":")))
+
+# read cache entry, compressed or legacy
+def read_cache_file(cache_file):
+    if cache_file.name.endswith(CACHE_SUFFIX):
+        with gzip.open(cache_file, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    with open(cache_file, "r") as f:
+        return json.load(f)
+
+# write cache entry as compressed json
+def write_cache_file(cache_file, cache_data):
+    write_file_atomic(cache_file, lambda f: json.dump(cache_data, f, separators=(",", ":")), compress=True)
+
+# list cache entry files (excludes the index)
+def get_cache_files():
+    return [
+        path for path in CACHE_DIR.iterdir()
+        if path.name.endswith(CACHE_SUFFIX)
+        or (path.name.endswith(LEGACY_CACHE_SUFFIX) and path != CACHE_INDEX_FILE)
+    ]
+
+# build cache index entry from cache data
+def index_entry(cache_data):
+    return {
+        "file_path": cache_data.get("file_path"),
+        "mod_time": cache_data.get("mod_time"),
+        "page_count": cache_data.get("page_count"),
+        "cached_at": cache_data.get("cached_at")
+    }
+
+# get cache key from cache entry filename
+def cache_key_from_filename(name):
+    if name.endswith(CACHE_SUFFIX):
+        return name[:-len(CACHE_SUFFIX)]
+    return name[:-len(LEGACY_CACHE_SUFFIX)]
+
+# check if filename is a pdf (extension is matched case-insensitively, e.g. Lecture.PDF)
+def is_pdf_name(name):
+    return name.lower().endswith(".pdf")
 
 # get all pdfs
 def get_all_pdfs():
@@ -33,7 +126,7 @@ def get_all_pdfs():
         print(f"Warning: GoodNotes folder not found at {FOLDER_PATH}")
         return []
     
-    pdf_files = list(FOLDER_PATH.rglob("*.pdf"))
+    pdf_files = [path for path in FOLDER_PATH.rglob("*") if is_pdf_name(path.name) and path.is_file()]
     return pdf_files
 
 # search files by name
@@ -93,14 +186,26 @@ def get_modified_files(file_paths):
 
 # mark files as processed
 def mark_files_processed(file_paths):
-    state = load_state()
-    
-    for file_path in file_paths:
-        file_key = str(file_path)
-        mod_time = file_path.stat().st_mtime
-        state[file_key] = mod_time
-    
-    save_state(state)
+    with cache_lock:
+        state = load_state()
+        
+        for file_path in file_paths:
+            file_key = str(file_path)
+            mod_time = file_path.stat().st_mtime
+            state[file_key] = mod_time
+        
+        save_state(state)
+    invalidate_library_snapshot()
+
+# remove files from processing state (e.g. deleted or renamed pdfs)
+def forget_processed_files(file_keys):
+    with cache_lock:
+        state = load_state()
+        
+        for file_key in file_keys:
+            state.pop(file_key, None)
+        
+        save_state(state)
 
 # generate cache key
 def get_cache_key(file_path):
@@ -108,39 +213,60 @@ def get_cache_key(file_path):
     path_hash = hashlib.md5(str(file_path.absolute()).encode()).hexdigest()
     return path_hash
 
+# get cache file for pdf, falling back to a legacy entry if one exists
+def get_cache_file(file_path):
+    cache_key = get_cache_key(file_path)
+    cache_file = CACHE_DIR / f"{cache_key}{CACHE_SUFFIX}"
+    legacy_file = CACHE_DIR / f"{cache_key}{LEGACY_CACHE_SUFFIX}"
+    
+    if not cache_file.exists() and legacy_file.exists():
+        return legacy_file
+    return cache_file
+
 # save extracted content to cache
-def save_content_to_cache(file_path, content):
+def save_content_to_cache(file_path, content, page_count=None):
     cache_key = get_cache_key(file_path)
-    cache_file = CACHE_DIR / f"{cache_key}.json"
+    cache_file = CACHE_DIR / f"{cache_key}{CACHE_SUFFIX}"
     
     cache_data = {
         "file_path": str(file_path),
         "file_name": file_path.name,
         "content": content,
         "cached_at": datetime.now().isoformat(),
-        "mod_time": file_path.stat().st_mtime
+        "mod_time": file_path.stat().st_mtime,
+        "page_count": page_count
     }
     
-    with open(cache_file, "w") as f:
-        json.dump(cache_data, f, indent=2)
+    # keep metadata in the index so listings don't need to open every cache file
+    with cache_lock:
+        write_cache_file(cache_file, cache_data)
+        
+        legacy_file = CACHE_DIR / f"{cache_key}{LEGACY_CACHE_SUFFIX}"
+        if legacy_file.exists():
+            legacy_file.unlink()
+        
+        index = load_cache_index()
+        index[cache_key] = index_entry(cache_data)
+        save_cache_index(index)
+    invalidate_library_snapshot()
 
 # load content from cache
 def load_content_from_cache(file_path):
-    cache_key = get_cache_key(file_path)
-    cache_file = CACHE_DIR / f"{cache_key}.json"
+    cache_file = get_cache_file(file_path)
     
     if not cache_file.exists():
         return None
     
     try:
-        with open(cache_file, "r") as f:
-            cache_data = json.load(f)
+        cache_data = read_cache_file(cache_file)
         
         # check if cache is still valid
         current_mod_time = file_path.stat().st_mtime
         cached_mod_time = cache_data.get("mod_time")
         
         if cached_mod_time and current_mod_time <= cached_mod_time:
+            # touch entry so budget eviction treats it as recently used
+            os.utime(cache_file)
             return cache_data["content"]
         else:
             # cache is stale
@@ -194,3 +320,181 @@ def get_files_by_terms(search_terms):
         "unchanged": [f for f in matching_files if f not in file_status["new"] and f not in file_status["updated"]],
         "all_files": matching_files
     }
+
+# walk notes folder once and collect metadata for every pdf
+def _scan_library():
+    entries = []
+    if not FOLDER_PATH.exists():
+        print(f"Warning: GoodNotes folder not found at {FOLDER_PATH}")
+        return entries
+    
+    state = load_state()
+    index = load_cache_index()
+    cached_keys = {cache_key_from_filename(path.name) for path in get_cache_files()}
+    
+    # scandir reuses the directory listing for stat calls, much cheaper than rglob + stat
+    stack = [FOLDER_PATH]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        stack.append(Path(item.path))
+                    elif is_pdf_name(item.name) and item.is_file():
+                        entries.append(_library_entry(Path(item.path), item.stat(), state, index, cached_keys))
+        except OSError as e:
+            print(f"Error scanning {folder}: {e}")
+    
+    return entries
+
+# build listing entry for a single pdf
+def _library_entry(file_path, stat, state, index, cached_keys):
+    cache_key = get_cache_key(file_path)
+    indexed = index.get(cache_key, {})
+    processed_mod_time = indexed.get("mod_time", state.get(str(file_path)))
+    
+    if cache_key not in cached_keys:
+        status = "not_cached"
+    elif processed_mod_time is not None and stat.st_mtime <= processed_mod_time:
+        status = "cached"
+    else:
+        status = "stale"
+    
+    relative = file_path.relative_to(FOLDER_PATH)
+    folder = relative.parent.as_posix()
+    
+    return {
+        "name": file_path.name,
+        "path": relative.as_posix(),
+        "folder": "" if folder == "." else folder,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "page_count": indexed.get("page_count"),
+        "status": status
+    }
+
+# walk folder and swap in a new library snapshot
+def _build_library_snapshot(force=False):
+    global _library_snapshot
+    
+    with _library_build_lock:
+        # another request may have finished the first build while we waited
+        if not force and _library_snapshot is not None and not _library_snapshot_is_stale(_library_snapshot):
+            return _library_snapshot
+        
+        with _library_lock:
+            generation = _library_generation
+        started = time.monotonic()
+        
+        entries = _scan_library()
+        entries.sort(key=lambda e: e["path"].lower())
+        
+        # etag only changes when the listing itself changes, not on every rescan
+        digest = hashlib.md5()
+        for e in entries:
+            digest.update(f"{e['path']}|{e['size']}|{e['mtime']}|{e['page_count']}|{e['status']}\n".encode())
+        
+        snapshot = {
+            "entries": entries,
+            "etag": digest.hexdigest(),
+            "built_at": started,
+            "generation": generation,
+            "sorted": {}
+        }
+        
+        with _library_lock:
+            _library_snapshot = snapshot
+        return snapshot
+
+# check if snapshot has outlived the ttl or been invalidated since its walk started
+def _library_snapshot_is_stale(snapshot):
+    return (
+        snapshot["generation"] != _library_generation
+        or time.monotonic() - snapshot["built_at"] >= LIBRARY_SNAPSHOT_TTL
+    )
+
+# background refresh of library snapshot
+def _refresh_library_snapshot():
+    global _library_refreshing
+    
+    try:
+        _build_library_snapshot(force=True)
+    except Exception as e:
+        print(f"Error refreshing library snapshot: {e}")
+    finally:
+        with _library_lock:
+            _library_refreshing = False
+
+# get library snapshot
+# a stale snapshot is still served while a background thread walks the folder,
+# so only the very first listing (or a forced one) waits for the walk
+def get_library_snapshot(force=False):
+    global _library_refreshing
+    
+    with _library_lock:
+        snapshot = _library_snapshot
+        if snapshot is not None and not force:
+            if _library_snapshot_is_stale(snapshot) and not _library_refreshing:
+                _library_refreshing = True
+                threading.Thread(target=_refresh_library_snapshot, name="library-refresh", daemon=True).start()
+            return snapshot
+    
+    return _build_library_snapshot(force=force)
+
+# mark library snapshot stale so the next listing triggers a refresh
+def invalidate_library_snapshot():
+    global _library_generation
+    
+    with _library_lock:
+        _library_generation += 1
+
+# get snapshot entries in the requested order, memoized per snapshot
+def _sorted_entries(snapshot, sort, order):
+    view_key = (sort, order)
+    view = snapshot["sorted"].get(view_key)
+    if view is not None:
+        return view
+    
+    reverse = order == "desc"
+    if sort in ("name", "path", "folder"):
+        key = lambda e: (e[sort].lower(), e["path"].lower())
+    else:
+        # files without a value (e.g. unknown page count) always go last
+        key = lambda e: (e[sort] is None, e[sort] or 0)
+    
+    if reverse:
+        known = [e for e in snapshot["entries"] if e[sort] is not None]
+        unknown = [e for e in snapshot["entries"] if e[sort] is None]
+        view = sorted(known, key=key, reverse=True) + unknown
+    else:
+        view = sorted(snapshot["entries"], key=key)
+    
+    snapshot["sorted"][view_key] = view
+    return view
+
+# check listing sort options, raises ValueError if invalid
+def validate_listing_options(sort, order):
+    if sort not in LIBRARY_SORT_KEYS:
+        raise ValueError(f"Invalid sort key '{sort}', expected one of: {', '.join(LIBRARY_SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid sort order '{order}', expected 'asc' or 'desc'")
+
+# filter, sort and paginate library listing
+def list_library(snapshot, query=None, prefix=None, sort="name", order="asc", offset=0, limit=100):
+    validate_listing_options(sort, order)
+    
+    entries = _sorted_entries(snapshot, sort, order)
+    
+    if prefix:
+        prefix_lower = prefix.lower()
+        entries = [e for e in entries if e["path"].lower().startswith(prefix_lower)]
+    
+    if query:
+        query_lower = query.lower()
+        entries = [e for e in entries if query_lower in e["name"].lower()]
+    
+    return {
+        "total": len(entries),
+        "files": entries[offset:offset + limit]
+    }
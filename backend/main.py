@@ -1,11 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import asynccontextmanager
+import hashlib
 import chat
 import fileData
+import cacheMaintenance
 
-app = FastAPI(title="Noteify API", description="API for Noteify", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app):
+    # runs once right away, then on the configured interval (one scheduler across all workers)
+    maintenance_scheduler = cacheMaintenance.start_maintenance_scheduler()
+    yield
+    if maintenance_scheduler:
+        maintenance_scheduler.set()
+
+app = FastAPI(title="Noteify API", description="API for Noteify", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,18 +33,84 @@ class ChatResponse(BaseModel):
     response: str
     files_used: List[str]
 
+class FileInfo(BaseModel):
+    name: str
+    path: str
+    folder: str
+    size: int
+    mtime: float
+    page_count: Optional[int] = None
+    status: str
+
 class FileListResponse(BaseModel):
-    files: List[str]
+    files: List[FileInfo]
+    total: int
+    offset: int
+    limit: int
+
+class CacheAreaStats(BaseModel):
+    content_cache: int
+    debug_images: int
+    outputs: int
+
+class CacheMaintenanceResponse(BaseModel):
+    compacted: int
+    temp_files_removed: int
+    orphans_removed: int
+    orphan_cleanup_skipped: Optional[str] = None
+    evicted: CacheAreaStats
+    reclaimed_bytes: CacheAreaStats
+    total_reclaimed_bytes: int
+    remaining_bytes: CacheAreaStats
+    cache_entries: int
+    duration_seconds: float
 
 @app.get("/")
 def root():
     return {"message": "Noteify API is running"}
 
+# check If-None-Match header against current etag
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 @app.get("/api/files", response_model=FileListResponse)
-def get_files():
+def get_files(
+    request: Request,
+    response: Response,
+    q: Optional[str] = None,
+    prefix: Optional[str] = None,
+    sort: str = "name",
+    order: str = "asc",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
     try:
-        pdfs = fileData.get_all_pdfs()
-        return FileListResponse(files=[pdf.name for pdf in pdfs])
+        # reject bad options before the etag check so they can't get a 304
+        fileData.validate_listing_options(sort, order)
+        snapshot = fileData.get_library_snapshot()
+
+        # listing etag covers the library snapshot and the requested page
+        params = f"{q}|{prefix}|{sort}|{order}|{offset}|{limit}"
+        etag = '"' + hashlib.md5(f"{snapshot['etag']}|{params}".encode()).hexdigest() + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        result = fileData.list_library(snapshot, query=q, prefix=prefix, sort=sort, order=order, offset=offset, limit=limit)
+        response.headers.update(headers)
+
+        return FileListResponse(
+            files=result["files"],
+            total=result["total"],
+            offset=offset,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -68,4 +145,11 @@ async def chat_endpoint(request: ChatRequest):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/cache/maintenance", response_model=CacheMaintenanceResponse)
+def cache_maintenance(force: bool = False):
+    try:
+        return CacheMaintenanceResponse(**cacheMaintenance.run_maintenance(force=force))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))